@@ -4,125 +4,553 @@ import subprocess
 import sys
 import os
 import argparse
+import csv
+import io
 import typing
 import time
 import re
+import math
+import resource
+import signal
+import hashlib
+import json
+import shelve
+import shutil
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+from collections import Counter, deque
 from pathlib import Path
-from enum import Enum
+from enum import Enum, IntEnum
 
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
 
-class Result(Enum):
+
+class Result(IntEnum):
     SAT = 1
     UNSAT = 2
     ERROR = 3
     TIMEOUT = 4
 
+    # Keep printing the names (e.g. 'Result.SAT') instead of the integer values
+    __str__ = Enum.__str__
+
+
+# Minisat prints its statistics in a fixed order, so a single scan picks up both counters.
+_MINISAT_STATS = re.compile(r'conflicts\s+:\s+(\d+).*?decisions\s+:\s+(\d+)', re.DOTALL)
+
+# Solvers are started through posix_spawn when subprocess can use it, which avoids duplicating the page tables of
+# this process with fork. It is only used with close_fds=False, an executable path containing a directory (see
+# resolve_executable) and without preexec_fn, cwd or start_new_session; passing any of those falls back to fork.
+# Keeping the descriptors open is safe, as Python creates them non-inheritable.
+_SPAWN_OPTIONS = {'close_fds': False}
+
+# Solvers are limited in CPU time, which is enforced by the kernel independently of the load on the host. The wall
+# clock timeout is only a fallback for solvers that are stuck without using the CPU, e.g. blocked on I/O.
+_WALL_TIMEOUT_FACTOR = 2
+
+_IVASAT_STATUSES = {'Sat': Result.SAT, 'Unsat': Result.UNSAT}
+_MINISAT_STATUSES = {'SATISFIABLE': Result.SAT, 'UNSATISFIABLE': Result.UNSAT}
+
 
 class ResultData:
-    def __init__(self, status: Result, time: float = 0, conflicts: int = 0, decisions: int = 0):
+    def __init__(self, status: Result, time: float = 0, conflicts: int = 0, decisions: int = 0, cpu_time: float = 0):
         self.status = status
         self.time = time
+        self.cpu_time = cpu_time
         self.conflicts = conflicts
         self.decisions = decisions
 
 
-def run_ivasat(path: str, filename: Path, timeout: int) -> ResultData:
+def last_line(s: str) -> str:
+    # Only the last line (the status) is needed, there is no need to split the whole output.
+    s = s.rstrip()
+    i = s.rfind('\n')
+    return s[i + 1:] if i >= 0 else s
+
+
+def pin_to_core(pid: int, core: typing.Optional[int]):
+    # A process that has already exited is left alone, its result is picked up when it is reaped
+    if core is None:
+        return
+    with contextlib.suppress(ProcessLookupError):
+        os.sched_setaffinity(pid, {core})
+
+
+def limit_resources(pid: int, cpu_limit: float, memory_limit: typing.Optional[int] = None,
+                    keep_hard_limit: bool = False):
+    """Limits the total CPU time (in seconds) and the address space (in bytes) of a running process.
+
+    The process gets SIGXCPU from the kernel once it used up its CPU time, and is killed a second later if it keeps
+    running. With `keep_hard_limit`, it is only sent SIGXCPU.
+    """
+    with contextlib.suppress(ProcessLookupError):
+        _, hard = resource.prlimit(pid, resource.RLIMIT_CPU)
+        soft = math.ceil(cpu_limit)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        if not keep_hard_limit:
+            # Solvers ignoring SIGXCPU are killed by the kernel
+            hard = soft + 1 if hard == resource.RLIM_INFINITY else min(soft + 1, hard)
+        resource.prlimit(pid, resource.RLIMIT_CPU, (soft, hard))
+        if memory_limit is not None:
+            resource.prlimit(pid, resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def over_budget(cpu_time: float, timeout: int) -> bool:
+    # RLIMIT_CPU has a granularity of whole seconds and is only checked on clock ticks, so a run stopped by it may be
+    # accounted slightly over the budget, or up to a tick below it if the solver exits on its own on SIGXCPU
+    return cpu_time >= timeout - 1 / os.sysconf('SC_CLK_TCK')
+
+
+def process_cpu_time(pid: int) -> float:
+    with open(f'/proc/{pid}/stat') as f:
+        # The command name may contain spaces, so the fields are counted from its closing parenthesis
+        fields = f.read().rpartition(')')[2].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+async def run_solver(command: list, timeout: int, core: typing.Optional[int] = None,
+                     memory_limit: typing.Optional[int] = None) -> typing.Tuple[str, float, float]:
+    """Runs a solver command and returns the tail of its standard output, its wall time and its CPU time.
+
+    The solver may use `timeout` seconds of CPU time and `memory_limit` bytes of memory. If `core` is given, the
+    solver process is pinned to that CPU.
+    """
+    loop = asyncio.get_running_loop()
+    # Solvers print their statistics and status at the end, so there is no need to keep the whole output.
+    tail = deque(maxlen=64)
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, **_SPAWN_OPTIONS)
+    output = asyncio.StreamReader()
+    exited = loop.create_future()
+    pidfd = None
+    transport = None
+
+    async def communicate():
+        async for line in output:
+            tail.append(line)
+        await exited
+
+    # Everything set up from here on is released in the finally block, even if the run is cancelled half-way
     try:
-        start = time.time()
-        captured_output = subprocess.run([path, str(filename)], stdout=subprocess.PIPE, timeout=timeout)
-        stop = time.time()
-        ivasat_stdout = captured_output.stdout.decode()
-
-        if 'Sat' == ivasat_stdout.splitlines(keepends=False)[-1]:
-            m = re.search(r"Decisions: (\d+)", ivasat_stdout)
-            num_decisions = int(m.group(1))
-            m = re.search(r'Conflicts: (\d+)', ivasat_stdout)
-            num_conflicts = int(m.group(1))
+        pin_to_core(proc.pid, core)
+        limit_resources(proc.pid, timeout, memory_limit)
 
-            return ResultData(Result.SAT, stop - start, conflicts=num_conflicts, decisions=num_decisions)
-        elif 'Unsat' == ivasat_stdout.splitlines(keepends=False)[-1]:
-            m = re.search(r'Decisions: (\d+)', ivasat_stdout)
-            num_decisions = int(m.group(1))
-            m = re.search(r'Conflicts: (\d+)', ivasat_stdout)
-            num_conflicts = int(m.group(1))
+        # The child is reaped with wait4 instead of asyncio's child watcher, as the latter discards its resource
+        # usage. A pidfd becomes readable once the process has terminated.
+        pidfd = os.pidfd_open(proc.pid)
+        loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(output), proc.stdout)
 
-            return ResultData(Result.UNSAT, stop - start, conflicts=num_conflicts, decisions=num_decisions)
+        await asyncio.wait_for(communicate(), timeout * _WALL_TIMEOUT_FACTOR)
+        stop = time.perf_counter()
+    except asyncio.TimeoutError:
+        raise subprocess.TimeoutExpired(command, timeout) from None
+    finally:
+        if not exited.done():
+            proc.kill()
+        if transport is not None:
+            transport.close()
+        else:
+            proc.stdout.close()
+        if pidfd is not None:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+    cpu_time = usage.ru_utime + usage.ru_stime
+    if proc.returncode == -signal.SIGXCPU or over_budget(cpu_time, timeout):
+        raise subprocess.TimeoutExpired(command, timeout)
+
+    return b''.join(tail).decode(), stop - start, cpu_time
+
+
+class IvasatServer:
+    """An ivasat process running in server mode, solving one instance at a time.
+
+    The process is started on the first request and restarted after it had to be killed or it exited.
+    """
+
+    def __init__(self, path: str, memory_limit: typing.Optional[int] = None):
+        self.path = path
+        self.memory_limit = memory_limit
+        self.proc = None
+        self.starting = None
+
+    async def solve(self, filename: str, timeout: int, core: typing.Optional[int] = None) -> dict:
+        if '\n' in filename:
+            # The file names are sent one per line, a newline would attach the responses to the wrong instances
+            raise ValueError(f'ivasat --server cannot solve {filename!r}, its name contains a newline')
+        if self.proc is not None and self.proc.returncode is not None:
+            # The process exited while it was idle
+            await self.stop()
+        if self.proc is None:
+            # Starting the process is shielded from cancellation: asyncio may wait forever for a process whose
+            # startup was cancelled half-way. stop() picks up the process if the caller gave up on it.
+            if self.starting is None:
+                self.starting = asyncio.ensure_future(asyncio.create_subprocess_exec(
+                    self.path, '--server', stdin=subprocess.PIPE, stdout=subprocess.PIPE, **_SPAWN_OPTIONS))
+            try:
+                self.proc = await asyncio.shield(self.starting)
+            except Exception:
+                # E.g. a missing executable, the next request tries again
+                self.starting = None
+                raise
+            self.starting = None
+        try:
+            # The server is long-running, so it is moved to the core assigned to the current instance
+            pin_to_core(self.proc.pid, core)
+            # The CPU limit covers the whole lifetime of the server, so the time used for earlier instances is added.
+            # The hard limit is kept, as a lowered one could not be raised again for the next instance.
+            limit_resources(self.proc.pid, process_cpu_time(self.proc.pid) + timeout, self.memory_limit,
+                            keep_hard_limit=True)
+
+            self.proc.stdin.write(filename.encode() + b'\n')
+            await self.proc.stdin.drain()
+            response = await asyncio.wait_for(self.proc.stdout.readline(), timeout * _WALL_TIMEOUT_FACTOR)
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise subprocess.TimeoutExpired([self.path, '--server'], timeout) from None
+        except Exception:
+            await self.stop()
+            raise
+
+        if not response:
+            if await self.stop() == -signal.SIGXCPU:
+                raise subprocess.TimeoutExpired([self.path, '--server'], timeout)
+            raise RuntimeError(f'ivasat exited while solving {filename}')
+
+        response = json.loads(response)
+        if over_budget(response['cpu_time'], timeout):
+            raise subprocess.TimeoutExpired([self.path, '--server'], timeout)
+        return response
+
+    async def stop(self) -> typing.Optional[int]:
+        """Stops the server process if it is running and returns its exit code."""
+        if self.starting is not None:
+            starting, self.starting = self.starting, None
+            try:
+                self.proc = await starting
+            except Exception:
+                # The process could not be started, there is nothing to stop
+                return None
+        if self.proc is None:
+            return None
+
+        if self.proc.returncode is None:
+            self.proc.kill()
+        returncode = await self.proc.wait()
+        self.proc = None
+        return returncode
+
+
+async def run_ivasat(servers: asyncio.Queue, filename: str, timeout: int,
+                     core: typing.Optional[int] = None) -> ResultData:
+    server = await servers.get()
+    try:
+        start = time.perf_counter()
+        response = await server.solve(filename, timeout, core)
+        stop = time.perf_counter()
+
+        stats = response['stats']
+        if stats['status'] == 'Error':
+            print(f'ivasat could not read {filename}', file=sys.stderr)
+        elif stats['status'] in _IVASAT_STATUSES:
+            return ResultData(_IVASAT_STATUSES[stats['status']], stop - start, conflicts=stats['conflicts'],
+                              decisions=stats['decisions'], cpu_time=response['cpu_time'])
 
     except subprocess.TimeoutExpired:
-        return ResultData(Result.TIMEOUT, timeout)
+        return ResultData(Result.TIMEOUT, timeout, cpu_time=timeout)
     except Exception as ex:
         print(ex, file=sys.stderr)
+    finally:
+        servers.put_nowait(server)
 
     return ResultData(Result.ERROR, 0)
 
 
-def run_minisat(path: str, filename: Path, timeout: int) -> ResultData:
+async def run_minisat(path: str, filename: str, timeout: int, core: typing.Optional[int] = None,
+                      memory_limit: typing.Optional[int] = None) -> ResultData:
     try:
-        start = time.time()
-        captured_output = subprocess.run([path, '-no-elim', str(filename)], stdout=subprocess.PIPE, timeout=timeout)
-        stop = time.time()
-        ivasat_stdout = captured_output.stdout.decode()
-
-        if 'SATISFIABLE' == ivasat_stdout.splitlines(keepends=False)[-1]:
-            m = re.search('decisions\s+: (\\d+)', ivasat_stdout)
-            num_decisions = int(m.group(1))
-            m = re.search('conflicts\s+: (\\d+)', ivasat_stdout)
-            num_conflicts = int(m.group(1))
-            return ResultData(Result.SAT, stop - start, conflicts=num_conflicts, decisions=num_decisions)
-        elif 'UNSATISFIABLE' == ivasat_stdout.splitlines(keepends=False)[-1]:
-            m = re.search('decisions\s+: (\\d+)', ivasat_stdout)
-            num_decisions = int(m.group(1))
-            m = re.search('conflicts\s+: (\\d+)', ivasat_stdout)
+        ivasat_stdout, wall_time, cpu_time = await run_solver([path, '-no-elim', filename], timeout, core,
+                                                             memory_limit)
+
+        status_line = last_line(ivasat_stdout)
+        if status_line == 'INDETERMINATE':
+            # Minisat stops searching and reports this status when it gets SIGXCPU
+            return ResultData(Result.TIMEOUT, timeout, cpu_time=timeout)
+        if status_line in _MINISAT_STATUSES:
+            m = _MINISAT_STATS.search(ivasat_stdout)
             num_conflicts = int(m.group(1))
-            return ResultData(Result.UNSAT, stop - start, conflicts=num_conflicts, decisions=num_decisions)
+            num_decisions = int(m.group(2))
+            return ResultData(_MINISAT_STATUSES[status_line], wall_time, conflicts=num_conflicts,
+                              decisions=num_decisions, cpu_time=cpu_time)
 
     except subprocess.TimeoutExpired:
-        return ResultData(Result.TIMEOUT, timeout)
+        return ResultData(Result.TIMEOUT, timeout, cpu_time=timeout)
     except Exception as ex:
         print(ex, file=sys.stderr)
 
     return ResultData(Result.ERROR, 0)
 
 
-def discover_tests(path: Path):
-    result = []
-    for root, dirs, files in os.walk(path):
-        for fname in files:
-            if fname.endswith('.cnf'):
-                result.append(pathlib.Path(root, fname))
+def sibling_cpus(cpu: int) -> typing.Set[int]:
+    # The hardware threads sharing a physical core with the given CPU, including itself
+    try:
+        with open(f'/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list') as f:
+            siblings = f.read().strip()
+    except OSError:
+        return {cpu}
+
+    result = set()
+    for part in siblings.split(','):
+        first, _, last = part.partition('-')
+        result.update(range(int(first), int(last or first) + 1))
     return result
 
 
+def physical_cores() -> typing.List[int]:
+    """Returns the CPUs this process may run on, keeping only one hardware thread of each physical core."""
+    cores = []
+    seen = set()
+    for cpu in sorted(os.sched_getaffinity(0)):
+        if cpu not in seen:
+            cores.append(cpu)
+            seen |= sibling_cpus(cpu)
+    return cores
+
+
+def solver_cpus() -> typing.List[int]:
+    """Returns the CPUs solvers are pinned to, in the order they are handed out.
+
+    Every physical core comes first, followed by the remaining hardware threads this process may run on.
+    """
+    cores = physical_cores()
+    return cores + sorted(os.sched_getaffinity(0).difference(cores))
+
+
+def discover_tests(path: Path) -> typing.Iterator[typing.Tuple[Path, str]]:
+    # Yields the path of every test along with its string form, so that it is only computed once
+    # os.scandir exposes the entry type without an extra stat call per file
+    stack = [path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError as ex:
+            # Unreadable directories are skipped, as os.walk does
+            print(ex, file=sys.stderr)
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.cnf'):
+                    test = pathlib.Path(entry.path)
+                    yield test, str(test)
+
+
+def file_digest(filename: Path) -> str:
+    if blake3 is not None:
+        # Memory-maps the file and hashes it with the SIMD implementation, without reading it into Python.
+        h = blake3()
+        h.update_mmap(filename)
+        return h.hexdigest()
+
+    with open(filename, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        h = hashlib.sha256()
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+        return h.hexdigest()
+
+
+def resolve_executable(path: str) -> str:
+    # Looks up bare command names in PATH, as posix_spawn is only used for executables given with a directory
+    return shutil.which(path) or path
+
+
+def solver_version(path: str) -> typing.Optional[str]:
+    # The modification time of the solver binary, so that rebuilding the solver invalidates its cached results.
+    executable = shutil.which(path)
+    return None if executable is None else str(os.path.getmtime(executable))
+
+
+async def benchmark(args, tests: typing.Iterable[typing.Tuple[Path, str]], cache) -> None:
+    timeout_value = int(args.timeout)
+    memory_limit = None if args.memory_limit is None else args.memory_limit * 1024 * 1024
+
+    # Each solver instance is single-threaded, so one running solver per core keeps every core busy. Every running
+    # solver is pinned to a CPU taken from this queue, so its caches stay warm. SMT siblings are only shared once
+    # every physical core is in use, and a CPU is only given to two solvers once every CPU is in use.
+    cpus = solver_cpus()
+    free_cores = asyncio.Queue()
+    for i in range(args.jobs):
+        free_cores.put_nowait(cpus[i % len(cpus)])
+    # Instances are solved by long-running ivasat processes, avoiding the startup cost of a new process per test.
+    servers = asyncio.Queue()
+    for _ in range(args.jobs):
+        servers.put_nowait(IvasatServer(resolve_executable(args.tool_path), memory_limit))
+
+    solvers = [('ivasat', args.tool_path, functools.partial(run_ivasat, servers))]
+    if args.minisat:
+        minisat_path = resolve_executable(args.minisat_path)
+        solvers.append(('minisat', minisat_path, functools.partial(run_minisat, minisat_path, memory_limit=memory_limit)))
+    versions = {name: solver_version(path) for name, path, _ in solvers}
+
+    statuses = Counter()
+    total_solver_time = 0
+
+    # Rows are kept in memory and written once at the end, sorted by test path, so that writing the output does not
+    # disturb the timings. If a checkpoint file is given, the rows are also appended to it regularly (in the order
+    # the tests finish) in case the benchmark crashes.
+    rows = []
+    line = io.StringIO()
+    writer = csv.writer(line, delimiter=';', lineterminator='\n')
+    num_rows = 0
+    checkpoint_fd = None
+    if args.checkpoint is not None:
+        checkpoint_fd = os.open(args.checkpoint, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    checkpointed = 0
+
+    def write_checkpoint():
+        nonlocal checkpointed
+        os.write(checkpoint_fd, ''.join(text for _, text in rows[checkpointed:]).encode())
+        checkpointed = len(rows)
+
+    async def run_cached(run, test_name: str, key: typing.Optional[str]) -> ResultData:
+        if key is not None and key in cache:
+            result = cache[key]
+            # A result found with a larger CPU budget would be a timeout under the current one
+            if result.cpu_time <= timeout_value:
+                return result
+
+        core = await free_cores.get()
+        try:
+            result = await run(test_name, timeout_value, core)
+        finally:
+            free_cores.put_nowait(core)
+
+        # Timeouts and errors depend on the timeout value and the environment, do not cache them.
+        if key is not None and result.status in (Result.SAT, Result.UNSAT):
+            cache[key] = result
+        return result
+
+    async def solve(test_name: str, digest: str) -> typing.List[ResultData]:
+        runs = []
+        for solver_name, _, run in solvers:
+            key = None
+            if not args.no_cache and versions[solver_name] is not None:
+                # The memory limit is part of the key, as a result found without it may not be reproducible with it
+                key = f'{solver_name}:{digest}:{versions[solver_name]}:{memory_limit}'
+            runs.append(run_cached(run, test_name, key))
+
+        return await asyncio.gather(*runs)
+
+    # Identical instances (e.g. copies under different names) are solved once, every copy reports the same results
+    solves = {}
+    # Tests are hashed in a single worker thread, so that the event loop keeps reaping the solvers meanwhile and
+    # hashing takes at most one CPU away from them, whatever the number of tests waiting for a solver
+    loop = asyncio.get_running_loop()
+    hasher = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    async def run_test(test: Path, test_name: str):
+        nonlocal total_solver_time, num_rows
+
+        try:
+            digest = await loop.run_in_executor(hasher, file_digest, test)
+        except OSError as ex:
+            # E.g. a broken symlink, the test is reported as an error for every solver
+            print(ex, file=sys.stderr)
+            results = [ResultData(Result.ERROR, 0) for _ in solvers]
+        else:
+            if digest not in solves:
+                solves[digest] = asyncio.ensure_future(solve(test_name, digest))
+            results = await solves[digest]
+
+        result = results[0]
+
+        statuses[result.status] += 1
+
+        total_solver_time += result.time
+        row = [test_name, result.status, f'{result.time:.2f}', f'{result.cpu_time:.2f}', result.decisions,
+               result.conflicts]
+        if args.minisat:
+            minisat_result = results[1]
+            row += [minisat_result.status, f'{minisat_result.time:.2f}', f'{minisat_result.cpu_time:.2f}',
+                    minisat_result.decisions, minisat_result.conflicts]
+        # Keep the trailing separator of the original format
+        writer.writerow(row + [''])
+        rows.append((test, line.getvalue()))
+        line.seek(0)
+        line.truncate()
+
+        num_rows += 1
+        if checkpoint_fd is not None and num_rows % 1000 == 0:
+            write_checkpoint()
+
+    try:
+        runs = []
+        for test, test_name in tests:
+            runs.append(asyncio.ensure_future(run_test(test, test_name)))
+            # Lets the test start right away, while the remaining ones are still being discovered
+            await asyncio.sleep(0)
+        await asyncio.gather(*runs)
+    except BaseException:
+        # Do not leave solver runs behind, the servers they use are only stopped once they are all done
+        pending = runs + list(solves.values())
+        for run in pending:
+            run.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise
+    finally:
+        hasher.shutdown(cancel_futures=True)
+        sys.stdout.writelines(text for _, text in sorted(rows, key=lambda r: r[0]))
+        sys.stdout.flush()
+        # A summary of the ivasat results, kept out of the rows
+        counts = ', '.join(f'{status.name}: {statuses[status]}' for status in Result)
+        print(f'ivasat: {sum(statuses.values())} tests, {counts}, total solver time: {total_solver_time:.2f}s',
+              file=sys.stderr)
+        if checkpoint_fd is not None:
+            write_checkpoint()
+            os.close(checkpoint_fd)
+        while not servers.empty():
+            await servers.get_nowait().stop()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog='benchmark.py')
     parser.add_argument('directory')
     parser.add_argument('--tool-path', default='cmake-build-release/src/ivasat')
     parser.add_argument('--minisat', action='store_true')
     parser.add_argument('--minisat-path', default='minisat')
-    parser.add_argument('--timeout', default=60)
+    parser.add_argument('--timeout', default=60, help='CPU time limit of a solver run in seconds')
+    parser.add_argument('--memory-limit', type=int, help='address space limit of a solver run in MiB')
+    parser.add_argument('--jobs', type=int, default=len(physical_cores()))
+    parser.add_argument('--cache-dir', default=os.path.expanduser('~/.cache/ivasat-bench'))
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--clean-cache', action='store_true')
+    parser.add_argument('--sorted', action='store_true', help='start the tests in the order of their paths, the output is always sorted')
+    parser.add_argument('--checkpoint', help='file the results are also written to while the benchmark is running')
 
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
     tests_dir = args.directory
-    tool = args.tool_path
-    timeout_value = int(args.timeout)
 
-    tests = sorted(discover_tests(tests_dir))
-    max_len = len(max(map(str, tests), key=len))
-    num_timeouts = 0
-    num_errors = 0
+    tests = discover_tests(tests_dir)
+    if args.sorted:
+        tests = sorted(tests)
 
-    total_solver_time = 0
-    for test in tests:
-        test_name = str(test)
-        result = run_ivasat(tool, test, timeout_value)
-
-        num_timeouts += 1 if result.status == Result.TIMEOUT else 0
-        num_errors += 1 if result.status == Result.ERROR else 0
-
-        total_solver_time += result.time
-        if args.minisat:
-            minisat_result = run_minisat('minisat', test, timeout_value)
-            print(f'{test_name};{result.status};{result.time:.2f};{result.decisions};{result.conflicts};{minisat_result.status};{minisat_result.time:.2f};{minisat_result.decisions};{minisat_result.conflicts};',
-                  flush=True)
-        else:
-            print(f'{test_name};{result.status};{result.time:.2f};{result.decisions};{result.conflicts};', flush=True)
+    if args.no_cache:
+        asyncio.run(benchmark(args, tests, {}))
+    else:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        with shelve.open(os.path.join(args.cache_dir, 'results'), flag='n' if args.clean_cache else 'c') as cache:
+            asyncio.run(benchmark(args, tests, cache))
@@ -226,6 +226,9 @@ public:
 
   void dumpStats(std::ostream& os) const;
 
+  /// Writes the final status and the statistics of the solver as a single-line JSON object, without a trailing newline.
+  void dumpStatsJson(std::ostream& os, Status status) const;
+
   // Solver implementation
   //==---------------------------------------------------------------------==//
 private:
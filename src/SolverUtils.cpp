@@ -49,6 +49,22 @@ void Solver::dumpStats(std::ostream& os) const
   os << "Pure literals found: " << mStats.pureLiterals << "\n";
 }
 
+void Solver::dumpStatsJson(std::ostream& os, Status status) const
+{
+  os << "{\"status\": \"" << status << "\"";
+  os << ", \"variables\": " << mStats.variables;
+  os << ", \"clauses\": " << mStats.clauses;
+  os << ", \"decisions\": " << mStats.decisions;
+  os << ", \"conflicts\": " << mStats.conflicts;
+  os << ", \"learned_clauses\": " << mStats.learnedClauses;
+  os << ", \"propagations\": " << mStats.propagations;
+  os << ", \"restarts\": " << mStats.restarts;
+  os << ", \"clauses_eliminated_by_simplification\": " << mStats.clausesEliminatedBySimplification;
+  os << ", \"clauses_eliminated_by_reduce\": " << mStats.clausesEliminatedByReduce;
+  os << ", \"pure_literals\": " << mStats.pureLiterals;
+  os << "}";
+}
+
 void Solver::dumpImplicationGraph(int conflictClauseIndex)
 {
   const auto& conflictClause = mClauses[conflictClauseIndex];
@@ -4,6 +4,8 @@
 #include <iostream>
 #include <fstream>
 #include <csignal>
+#include <ctime>
+#include <string_view>
 
 static std::unique_ptr<ivasat::Solver> solver;
 
@@ -13,14 +15,64 @@ static void interrupt_solver([[maybe_unused]] int num)
   exit(1);
 }
 
+/// Solves the instances whose paths are read from the standard input, one per line, writing a single JSON line with
+/// the used CPU time and the solver statistics for each of them. Lets the benchmark scripts solve many instances
+/// without starting a new process for every one of them. Instances that cannot be read are reported with the status
+/// "Error".
+static int run_server()
+{
+  std::string file;
+  while (std::getline(std::cin, file)) {
+    std::clock_t start = std::clock();
+
+    std::ifstream input(file);
+    if (!input) {
+      std::cout << "{\"cpu_time\": 0, \"stats\": {\"status\": \"Error\"}}" << std::endl;
+      continue;
+    }
+
+    auto instance = ivasat::parseDimacs(input);
+    solver = std::make_unique<ivasat::Solver>(*instance);
+    auto status = solver->check();
+
+    double cpuTime = static_cast<double>(std::clock() - start) / CLOCKS_PER_SEC;
+    std::cout << "{\"cpu_time\": " << cpuTime << ", \"stats\": ";
+    solver->dumpStatsJson(std::cout, status);
+    std::cout << "}" << std::endl;
+  }
+
+  return 0;
+}
+
 int main(int argc, char* argv[])
 {
-  if (argc != 2) {
-    std::cerr << "USAGE: ivasat <file>\n";
+  bool statsJson = false;
+  std::string file;
+
+  for (int i = 1; i < argc; ++i) {
+    std::string_view arg = argv[i];
+    if (arg == "--server") {
+      if (argc == 2) {
+        return run_server();
+      }
+      file.clear();
+      break;
+    } else if (arg == "--stats-json") {
+      statsJson = true;
+    } else if (file.empty()) {
+      file = arg;
+    } else {
+      file.clear();
+      break;
+    }
+  }
+
+  if (file.empty()) {
+    std::cerr << "USAGE: ivasat [--stats-json] <file>\n";
+    std::cerr << "       ivasat --server\n";
     return 1;
   }
 
-  std::string file = argv[1];
   std::ifstream input(file);
 
   auto instance = ivasat::parseDimacs(input);
@@ -32,4 +84,10 @@ int main(int argc, char* argv[])
   solver->dumpStats(std::cout);
 
   std::cout << status << "\n";
+
+  if (statsJson) {
+    // Machine-readable statistics for the benchmark scripts
+    solver->dumpStatsJson(std::cerr, status);
+    std::cerr << "\n";
+  }
 }
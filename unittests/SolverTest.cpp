@@ -1,4 +1,5 @@
 #include "ivasat/ivasat.h"
+#include "Solver.h"
 
 #include <gtest/gtest.h>
 
@@ -419,4 +420,46 @@ p cnf 15 15
   auto inst = parseDimacs(ss);
 
   EXPECT_TRUE(assertSat(*inst, Status::Sat));
-}
\ No newline at end of file
+}
+
+static std::string statsField(const std::string& stats, const std::string& name)
+{
+  auto begin = stats.find(name + ": ");
+  if (begin == std::string::npos) {
+    return "";
+  }
+
+  begin += name.size() + 2;
+  return stats.substr(begin, stats.find('\n', begin) - begin);
+}
+
+TEST(SolverTest, dump_stats_json)
+{
+  // (a | ~b) & (~a | c | ~d) & (a | c | ~d) & (~c | ~e) & (~c | e) & (c | d)
+  Instance inst(5, {
+    {1, -2},
+    {-1, 3, -4},
+    {1, 3, -4},
+    {-3, -5},
+    {-3, 5},
+    {3, 4}
+  });
+
+  Solver solver(inst);
+  Status status = solver.check();
+  ASSERT_EQ(status, Status::Unsat);
+
+  std::stringstream stats;
+  solver.dumpStats(stats);
+
+  std::stringstream json;
+  solver.dumpStatsJson(json, status);
+
+  std::string output = json.str();
+  EXPECT_EQ(output.front(), '{');
+  EXPECT_EQ(output.back(), '}');
+  EXPECT_EQ(output.find('\n'), std::string::npos);
+  EXPECT_NE(output.find("\"status\": \"Unsat\""), std::string::npos);
+  EXPECT_NE(output.find("\"decisions\": " + statsField(stats.str(), "Decisions") + ","), std::string::npos);
+  EXPECT_NE(output.find("\"conflicts\": " + statsField(stats.str(), "Conflicts") + ","), std::string::npos);
+}